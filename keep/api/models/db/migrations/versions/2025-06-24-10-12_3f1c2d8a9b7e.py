@@ -0,0 +1,29 @@
+"""Add tenant/service index to topologyservice
+
+Revision ID: 3f1c2d8a9b7e
+Revises: 9dd1be4539e0
+Create Date: 2025-06-24 10:12:31.482913
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "3f1c2d8a9b7e"
+down_revision = "9dd1be4539e0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("topologyservice", schema=None) as batch_op:
+        batch_op.create_index(
+            "idx_topologyservice_tenant_service",
+            ["tenant_id", "service"],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("topologyservice", schema=None) as batch_op:
+        batch_op.drop_index("idx_topologyservice_tenant_service")
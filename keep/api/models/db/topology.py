@@ -3,7 +3,7 @@ from typing import List, Optional
 from uuid import UUID, uuid4
 
 from pydantic import BaseModel
-from sqlalchemy import DateTime, ForeignKey
+from sqlalchemy import DateTime, ForeignKey, Index
 from sqlmodel import JSON, Column, Field, Relationship, SQLModel, func
 
 
@@ -37,6 +37,10 @@ class TopologyApplication(SQLModel, table=True):
 
 
 class TopologyService(SQLModel, table=True):
+    __table_args__ = (
+        Index("idx_topologyservice_tenant_service", "tenant_id", "service"),
+    )
+
     id: Optional[int] = Field(primary_key=True, default=None)
     tenant_id: str = Field(sa_column=Column(ForeignKey("tenant.id")))
     source_provider_id: str = "unknown"
@@ -1,10 +1,10 @@
 import json
 import logging
 from typing import List, Optional
-from uuid import UUID
+from uuid import UUID, uuid4
 
 from pydantic import ValidationError
-from sqlalchemy import and_, or_, exists
+from sqlalchemy import and_, delete, exists, insert, or_
 from sqlalchemy.orm import joinedload, selectinload
 from sqlmodel import Session, select
 
@@ -187,9 +187,9 @@ class TopologiesService:
         tenant_id: str, session: Session
     ) -> List[TopologyApplicationDtoOut]:
         applications = session.exec(
-            select(TopologyApplication).where(
-                TopologyApplication.tenant_id == tenant_id
-            )
+            select(TopologyApplication)
+            .where(TopologyApplication.tenant_id == tenant_id)
+            .options(selectinload(TopologyApplication.services))
         ).all()
         result = []
         for application in applications:
@@ -260,52 +260,54 @@ class TopologiesService:
         """Creates multiple applications for a given tenant in a single transaction."""
 
         try:
-            new_applications = []
-            new_links = []
-
-            for application in applications:
-                service_ids = [service.id for service in application.services]
-                if not service_ids:
-                    raise InvalidApplicationDataException(
-                        "Each application must have at least one service"
-                    )
+            application_service_ids = [
+                [service.id for service in application.services]
+                for application in applications
+            ]
+            if not all(application_service_ids):
+                raise InvalidApplicationDataException(
+                    "Each application must have at least one service"
+                )
 
-                # Fetch existing services
-                services_to_add = session.exec(
-                    select(TopologyService)
+            # Fetch existing services of all applications in a single query
+            requested_service_ids = {
+                _id for service_ids in application_service_ids for _id in service_ids
+            }
+            existing_service_ids = set(
+                session.exec(
+                    select(TopologyService.id)
                     .where(TopologyService.tenant_id == tenant_id)
-                    .where(TopologyService.id.in_(service_ids))
+                    .where(TopologyService.id.in_(requested_service_ids))
                 ).all()
-
-                if len(services_to_add) != len(service_ids):
-                    raise ServiceNotFoundException("One or more services not found")
-
-                new_application = TopologyApplication(
-                    tenant_id=tenant_id,
-                    name=application.name,
-                    description=application.description,
+            )
+            if existing_service_ids != requested_service_ids or any(
+                len(set(service_ids)) != len(service_ids)
+                for service_ids in application_service_ids
+            ):
+                raise ServiceNotFoundException("One or more services not found")
+
+            application_rows = []
+            link_rows = []
+            for application, service_ids in zip(applications, application_service_ids):
+                # Preserve ID if provided, otherwise assign it here so the links
+                # can be built without reading it back from the database
+                application_id = application.id or uuid4()
+                application_rows.append(
+                    {
+                        "id": application_id,
+                        "tenant_id": tenant_id,
+                        "name": application.name,
+                        "description": application.description,
+                    }
                 )
-
-                if application.id:
-                    new_application.id = application.id  # Preserve ID if provided
-
-                session.add(new_application)
-                new_applications.append(new_application)
-
-            session.flush()  # Assigns IDs to new applications
-
-            for new_application, application in zip(new_applications, applications):
-                new_links.extend(
-                    [
-                        TopologyServiceApplication(
-                            service_id=service.id, application_id=new_application.id
-                        )
-                        for service in application.services
-                        if service.id
-                    ]
+                link_rows.extend(
+                    {"service_id": service_id, "application_id": application_id}
+                    for service_id in service_ids
                 )
 
-            session.add_all(new_links)
+            if application_rows:
+                session.execute(insert(TopologyApplication), application_rows)
+                session.execute(insert(TopologyServiceApplication), link_rows)
             session.commit()
 
         except Exception as e:
@@ -475,9 +477,11 @@ class TopologiesService:
         """Creates multiple services in a single transaction without returning them."""
 
         try:
-            for service in services:
-                db_service = TopologyService(**service.dict(), tenant_id=tenant_id)
-                session.add(db_service)
+            service_rows = [
+                {**service.dict(), "tenant_id": tenant_id} for service in services
+            ]
+            if service_rows:
+                session.execute(insert(TopologyService), service_rows)
 
             session.commit()
 
@@ -607,23 +611,21 @@ class TopologiesService:
         """Creates multiple dependencies in a single transaction."""
 
         try:
-            db_dependencies = []
-
-            for dependency in dependencies:
-                # Enforcing is_manual on the service_id and depends_on_service_id
-                if enforce_manual and validate_non_manual_exists(
-                    service_ids=[
-                        dependency.service_id,
-                        dependency.depends_on_service_id,
-                    ],
-                    session=session,
-                    tenant_id=tenant_id,
-                ):
-                    raise ServiceNotManualException()
-
-                db_dependency = TopologyServiceDependency(**dependency.dict())
-                session.add(db_dependency)
-                db_dependencies.append(db_dependency)
+            # Enforcing is_manual on the service_id and depends_on_service_id
+            if enforce_manual and validate_non_manual_exists(
+                service_ids=[
+                    _id
+                    for dependency in dependencies
+                    for _id in (dependency.service_id, dependency.depends_on_service_id)
+                ],
+                session=session,
+                tenant_id=tenant_id,
+            ):
+                raise ServiceNotManualException()
+
+            dependency_rows = [dependency.dict() for dependency in dependencies]
+            if dependency_rows:
+                session.execute(insert(TopologyServiceDependency), dependency_rows)
 
             session.commit()
 
@@ -709,36 +711,50 @@ class TopologiesService:
     def clean_before_import(tenant_id: str, session: Session):
         """Removes all services and applications for a given tenant before importing a new topology."""
         try:
+            tenant_service_ids = select(TopologyService.id).where(
+                TopologyService.tenant_id == tenant_id
+            )
+
             # Delete all dependencies for this tenant
-            session.query(TopologyServiceDependency).filter(
-                TopologyServiceDependency.service.has(
-                    TopologyService.tenant_id == tenant_id
+            session.execute(
+                delete(TopologyServiceDependency)
+                .where(
+                    or_(
+                        TopologyServiceDependency.service_id.in_(tenant_service_ids),
+                        TopologyServiceDependency.depends_on_service_id.in_(
+                            tenant_service_ids
+                        ),
+                    )
                 )
-            ).delete(synchronize_session=False)
-    
+                .execution_options(synchronize_session=False)
+            )
+
             # Delete all service-application links for this tenant
-            session.query(TopologyServiceApplication).filter(
-                TopologyServiceApplication.service.has(
-                    TopologyService.tenant_id == tenant_id
-                )
-            ).delete(synchronize_session=False)
-    
+            session.execute(
+                delete(TopologyServiceApplication)
+                .where(TopologyServiceApplication.service_id.in_(tenant_service_ids))
+                .execution_options(synchronize_session=False)
+            )
+
             # Delete all applications for this tenant
-            session.query(TopologyApplication).filter(
-                TopologyApplication.tenant_id == tenant_id
-            ).delete(synchronize_session=False)
-    
+            session.execute(
+                delete(TopologyApplication)
+                .where(TopologyApplication.tenant_id == tenant_id)
+                .execution_options(synchronize_session=False)
+            )
+
             # Delete all services for this tenant
-            session.query(TopologyService).filter(
-                TopologyService.tenant_id == tenant_id
-            ).delete(synchronize_session=False)
-    
+            session.execute(
+                delete(TopologyService)
+                .where(TopologyService.tenant_id == tenant_id)
+                .execution_options(synchronize_session=False)
+            )
+
             session.commit()
         except Exception as e:
             session.rollback()
             logger.error(f"Error during cleanup before import: {e}")
             raise e
-        
 
     @staticmethod
     def import_to_db(topology_data: dict, session: Session, tenant_id: str):
@@ -9,7 +9,6 @@ from sqlmodel import select
 from keep.api.core.config import config
 from keep.api.core.db import (
     add_alerts_to_incident,
-    assign_alert_to_incident,
     enrich_incidents_with_alerts,
     existed_or_new_session,
     get_last_alerts,
@@ -361,18 +360,18 @@ class TopologyProcessor:
             session.add(incident)
             session.flush()
 
-            # Get all alerts for the services and find max severity
-            for service in services_with_alerts:
-                service_alerts = services_with_alerts[service]
-
-                # Assign alerts to incident
-                for alert in service_alerts:
-                    incident = assign_alert_to_incident(
-                        fingerprint=alert.fingerprint,
-                        incident=incident,
-                        tenant_id=tenant_id,
-                        session=session,
-                    )
+            # Assign the alerts of all services to the incident in a single batch
+            fingerprints = [
+                alert.fingerprint
+                for service_alerts in services_with_alerts.values()
+                for alert in service_alerts
+            ]
+            incident = add_alerts_to_incident(
+                tenant_id=tenant_id,
+                incident=incident,
+                fingerprints=fingerprints,
+                session=session,
+            )
 
             # Send notification about new incident
             incident_dto = IncidentDto.from_db_incident(incident)
@@ -9,6 +9,10 @@ from keep.api.core.dependencies import SINGLE_TENANT_UUID
 from keep.api.models.db.tenant import TenantApiKey
 
 
+# test_app and client are function-scoped on purpose: the app is built from
+# per-test environment variables (monkeypatch) and provisions resources into
+# the per-test database created by db_session, so neither can be shared
+# across a module without leaking state between tests.
 @pytest.fixture
 def test_app(monkeypatch, request, db_session):
     # Store original setup_logging function
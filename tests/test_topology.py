@@ -1,18 +1,22 @@
 from datetime import datetime, timezone
 import uuid
 import pytest
+from sqlalchemy import event, insert
 from sqlmodel import select
-from unittest.mock import patch
+from unittest.mock import MagicMock
 
 from keep.api.core.dependencies import SINGLE_TENANT_UUID
-from keep.api.models.db.alert import Alert, LastAlert, Incident
+from keep.api.models.db.alert import Alert, Incident, LastAlert, LastAlertToIncident
 from keep.api.models.db.topology import (
     TopologyApplication,
     TopologyApplicationDtoIn,
     TopologyService,
+    TopologyServiceApplication,
     TopologyServiceDependency,
     TopologyServiceDtoIn,
 )
+from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
+from keep.rulesengine.rulesengine import RulesEngine
 from keep.topologies.topologies_service import (
     TopologiesService,
     ApplicationNotFoundException,
@@ -24,29 +28,51 @@ from tests.fixtures.client import setup_api_key, client, test_app  # noqa: F401
 
 
 VALID_API_KEY = "valid_api_key"
+_FIXED_NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def create_services(db_session, tenant_id, ids: list[str], commit=True):
+    services = [
+        TopologyService(
+            tenant_id=tenant_id,
+            service="test_service_" + id,
+            display_name=id,
+            repository="test_repository",
+            tags=["test_tag"],
+            description="test_description",
+            team="test_team",
+            email="test_email",
+            slack="test_slack",
+            updated_at=_FIXED_NOW,
+        )
+        for id in ids
+    ]
+    db_session.add_all(services)
+    if commit:
+        db_session.commit()
+    return services
 
 
 def create_service(db_session, tenant_id, id):
-    service = TopologyService(
-        tenant_id=tenant_id,
-        service="test_service_" + id,
-        display_name=id,
-        repository="test_repository",
-        tags=["test_tag"],
-        description="test_description",
-        team="test_team",
-        email="test_email",
-        slack="test_slack",
-        updated_at=datetime.now(),
-    )
-    db_session.add(service)
-    db_session.commit()
-    return service
+    return create_services(db_session, tenant_id, [id])[0]
+
+
+def _exists(db_session, column, *criteria):
+    return (
+        db_session.exec(select(column).where(*criteria).limit(1)).first()
+        is not None
+    )
+
+
+@pytest.fixture
+def seeded_services(db_session):
+    # db_session is a fresh in-memory database per test, so seeding here is
+    # already isolated between tests
+    return create_services(db_session, SINGLE_TENANT_UUID, ["1", "2"])
 
 
-def test_get_all_topology_data(db_session):
-    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
-    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
+def test_get_all_topology_data(db_session, seeded_services):
+    service_1, service_2 = seeded_services
 
     result = TopologiesService.get_all_topology_data(SINGLE_TENANT_UUID, db_session)
     # We have no dependencies, so we should not return any services
@@ -55,7 +81,7 @@ def test_get_all_topology_data(db_session):
     dependency = TopologyServiceDependency(
         service_id=service_1.id,
         depends_on_service_id=service_2.id,
-        updated_at=datetime.now(),
+        updated_at=_FIXED_NOW,
     )
     db_session.add(dependency)
     db_session.commit()
@@ -72,9 +98,8 @@ def test_get_all_topology_data(db_session):
     assert result[1].service == "test_service_2"
 
 
-def test_get_applications_by_tenant_id(db_session):
-    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
-    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
+def test_get_applications_by_tenant_id(db_session, seeded_services):
+    service_1, service_2 = seeded_services
     application_1 = TopologyApplication(
         tenant_id=SINGLE_TENANT_UUID,
         name="Test Application",
@@ -98,6 +123,42 @@ def test_get_applications_by_tenant_id(db_session):
     assert result[1].name == "Test Application 2"
     assert len(result[1].services) == 1
 
+
+def test_get_applications_by_tenant_id_query_count(db_session):
+    services = create_services(db_session, SINGLE_TENANT_UUID, ["1", "2", "3"])
+    db_session.add_all(
+        [
+            TopologyApplication(
+                tenant_id=SINGLE_TENANT_UUID,
+                name=f"Test Application {i}",
+                services=services,
+            )
+            for i in range(5)
+        ]
+    )
+    db_session.commit()
+
+    queries = []
+
+    def count_selects(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            queries.append(statement)
+
+    engine = db_session.get_bind()
+    event.listen(engine, "before_cursor_execute", count_selects)
+    try:
+        result = TopologiesService.get_applications_by_tenant_id(
+            SINGLE_TENANT_UUID, db_session
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", count_selects)
+
+    assert len(result) == 5
+    assert all(len(application.services) == 3 for application in result)
+    # One query for the applications and one for all of their services
+    assert len(queries) <= 2
+
+
 def test_create_application_by_tenant_id(db_session):
     application_dto = TopologyApplicationDtoIn(name="New Application", services=[])
 
@@ -114,8 +175,7 @@ def test_create_application_by_tenant_id(db_session):
 
     application_dto.services = []
 
-    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
-    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
+    service_1, service_2 = create_services(db_session, SINGLE_TENANT_UUID, ["1", "2"])
 
     application_dto.services.append(TopologyServiceDtoIn(id=service_1.id))
     application_dto.services.append(TopologyServiceDtoIn(id=service_2.id))
@@ -179,22 +239,29 @@ def test_get_applications(db_session, client, test_app):
         db_session, VALID_API_KEY, tenant_id=SINGLE_TENANT_UUID, role="webhook"
     )
 
-    service_1 = create_service(db_session, SINGLE_TENANT_UUID, "1")
-    service_2 = create_service(db_session, SINGLE_TENANT_UUID, "2")
-    service_3 = create_service(db_session, SINGLE_TENANT_UUID, "3")
+    service_1, service_2, service_3 = create_services(
+        db_session, SINGLE_TENANT_UUID, ["1", "2", "3"]
+    )
 
     application_1 = TopologyApplication(
-        tenant_id=SINGLE_TENANT_UUID,
-        name="Test Application",
-        services=[service_1, service_2],
+        tenant_id=SINGLE_TENANT_UUID, name="Test Application"
     )
     application_2 = TopologyApplication(
-        tenant_id=SINGLE_TENANT_UUID,
-        name="Test Application 2",
-        services=[service_3],
+        tenant_id=SINGLE_TENANT_UUID, name="Test Application 2"
+    )
+    db_session.add_all([application_1, application_2])
+    db_session.flush()
+    db_session.execute(
+        insert(TopologyServiceApplication),
+        [
+            {"application_id": application.id, "service_id": service.id}
+            for application, services in (
+                (application_1, [service_1, service_2]),
+                (application_2, [service_3]),
+            )
+            for service in services
+        ],
     )
-    db_session.add(application_1)
-    db_session.add(application_2)
     db_session.commit()
 
     response = client.get(
@@ -292,12 +359,11 @@ def test_delete_application(db_session, client, test_app):
     assert response.json()["message"] == "Application deleted successfully"
 
 
-def test_clean_before_import(db_session):
+def test_clean_before_import(db_session, seeded_services):
     # Setup: Create services, applications, and dependencies for one tenant
     tenant_id = SINGLE_TENANT_UUID
 
-    service_1 = create_service(db_session, tenant_id, "1")
-    service_2 = create_service(db_session, tenant_id, "2")
+    service_1, service_2 = seeded_services
 
     application = TopologyApplication(
         tenant_id=tenant_id,
@@ -310,23 +376,31 @@ def test_clean_before_import(db_session):
     dependency = TopologyServiceDependency(
         service_id=service_1.id,
         depends_on_service_id=service_2.id,
-        updated_at=datetime.now(),
+        updated_at=_FIXED_NOW,
     )
     db_session.add(dependency)
     db_session.commit()
 
     # Assert data exists before cleaning
-    assert db_session.exec(select(TopologyService).where(TopologyService.tenant_id == tenant_id)).all()
-    assert db_session.exec(select(TopologyApplication).where(TopologyApplication.tenant_id == tenant_id)).all()
-    assert db_session.exec(select(TopologyServiceDependency)).all()
+    assert _exists(
+        db_session, TopologyService.id, TopologyService.tenant_id == tenant_id
+    )
+    assert _exists(
+        db_session, TopologyApplication.id, TopologyApplication.tenant_id == tenant_id
+    )
+    assert _exists(db_session, TopologyServiceDependency.id)
 
     # Act: Call the clean_before_import function
     TopologiesService.clean_before_import(tenant_id, db_session)
 
     # Assert: Ensure all data is deleted for this tenant
-    assert not db_session.exec(select(TopologyService).where(TopologyService.tenant_id == tenant_id)).all()
-    assert not db_session.exec(select(TopologyApplication).where(TopologyApplication.tenant_id == tenant_id)).all()
-    assert not db_session.exec(select(TopologyServiceDependency)).all()
+    assert not _exists(
+        db_session, TopologyService.id, TopologyService.tenant_id == tenant_id
+    )
+    assert not _exists(
+        db_session, TopologyApplication.id, TopologyApplication.tenant_id == tenant_id
+    )
+    assert not _exists(db_session, TopologyServiceDependency.id)
 
 
 def test_import_to_db(db_session):
@@ -376,23 +450,67 @@ def test_import_to_db(db_session):
 
         TopologiesService.import_to_db(topology_data, db_session, tenant_id)
 
-        services = db_session.exec(select(TopologyService).where(TopologyService.tenant_id == tenant_id)).all()
+        services = db_session.exec(
+            select(TopologyService).where(TopologyService.tenant_id == tenant_id)
+        ).all()
         assert len(services) == 2
         assert services[0].service == "test_service_1"
         assert services[1].service == "test_service_2"
 
-        applications = db_session.exec(select(TopologyApplication).where(TopologyApplication.tenant_id == tenant_id)).all()
-        assert len(applications) == 2
-        assert applications[0].name == "Test Application 1"
-        assert applications[1].name == "Test Application 2"
+        application_names = db_session.exec(
+            select(TopologyApplication.name).where(
+                TopologyApplication.tenant_id == tenant_id
+            )
+        ).all()
+        assert application_names == ["Test Application 1", "Test Application 2"]
+
+        dependencies = db_session.exec(
+            select(
+                TopologyServiceDependency.service_id,
+                TopologyServiceDependency.depends_on_service_id,
+            )
+        ).all()
+        assert [tuple(dependency) for dependency in dependencies] == [(1, 2)]
+
+
+@pytest.mark.parametrize(
+    "application_services, expected_exception",
+    [
+        ([], InvalidApplicationDataException),
+        ([1, 999], ServiceNotFoundException),
+        ([1, 1], ServiceNotFoundException),
+    ],
+)
+def test_import_to_db_invalid_application(
+    db_session, application_services, expected_exception
+):
+    tenant_id = SINGLE_TENANT_UUID
+    topology_data = {
+        "services": [
+            {
+                "id": 1,
+                "service": "test_service_1",
+                "display_name": "Service 1",
+            },
+        ],
+        "applications": [
+            {
+                "name": "Test Application 1",
+                "services": application_services,
+            },
+        ],
+        "dependencies": [],
+    }
 
-        dependencies = db_session.exec(select(TopologyServiceDependency)).all()
-        assert len(dependencies) == 1
-        assert dependencies[0].service_id == 1
-        assert dependencies[0].depends_on_service_id == 2
+    with pytest.raises(expected_exception):
+        TopologiesService.import_to_db(topology_data, db_session, tenant_id)
+
+    assert not _exists(
+        db_session, TopologyApplication.id, TopologyApplication.tenant_id == tenant_id
+    )
 
 
-def test_create_application_based_incident_with_flush(db_session):
+def test_create_application_based_incident_with_flush(db_session, monkeypatch):
     """
     Test that verifies the session.flush() changes in _create_application_based_incident
     don't break the incident creation flow.
@@ -406,8 +524,10 @@ def test_create_application_based_incident_with_flush(db_session):
     # Setup: Create services and application
     tenant_id = SINGLE_TENANT_UUID
 
-    service_1 = create_service(db_session, tenant_id, "service_1")
-    service_2 = create_service(db_session, tenant_id, "service_2")
+    # Committed together with the alerts below
+    service_1, service_2 = create_services(
+        db_session, tenant_id, ["service_1", "service_2"], commit=False
+    )
 
     application = TopologyApplication(
         tenant_id=tenant_id,
@@ -415,8 +535,6 @@ def test_create_application_based_incident_with_flush(db_session):
         services=[service_1, service_2],
     )
     db_session.add(application)
-    db_session.commit()
-    db_session.refresh(application)
 
     # Create alerts for the services
     def _create_test_event(fingerprint, service_name):
@@ -443,10 +561,9 @@ def test_create_application_based_incident_with_flush(db_session):
         fingerprint="test-alert-2",
     )
 
-    db_session.add_all([alert_1, alert_2])
-    db_session.commit()
-
     # Create LastAlert records (required for alert assignment)
+    # Alert ids and timestamps are generated client-side, so the LastAlert rows
+    # can reference them without flushing the alerts first
     last_alert_1 = LastAlert(
         tenant_id=tenant_id,
         fingerprint="test-alert-1",
@@ -461,11 +578,10 @@ def test_create_application_based_incident_with_flush(db_session):
         first_timestamp=alert_2.timestamp,
         alert_id=alert_2.id,
     )
-    db_session.add_all([last_alert_1, last_alert_2])
+    db_session.bulk_save_objects([alert_1, alert_2, last_alert_1, last_alert_2])
     db_session.commit()
 
     # Convert to AlertDto format
-    from keep.api.utils.enrichment_helpers import convert_db_alerts_to_dto_alerts
     alert_dtos = convert_db_alerts_to_dto_alerts([alert_1, alert_2])
 
     services_with_alerts = {
@@ -474,29 +590,28 @@ def test_create_application_based_incident_with_flush(db_session):
     }
 
     # Verify no incidents exist before the test
-    incidents_before = db_session.exec(
-        select(Incident).where(Incident.tenant_id == tenant_id)
-    ).all()
-    assert len(incidents_before) == 0
+    assert not _exists(db_session, Incident.id, Incident.tenant_id == tenant_id)
 
     # Mock the workflow event to prevent side effects
-    with patch("keep.topologies.topology_processor.RulesEngine.send_workflow_event") as mock_workflow:
-        # Create the topology processor and call the method
-        processor = TopologyProcessor()
+    mock_workflow = MagicMock()
+    monkeypatch.setattr(RulesEngine, "send_workflow_event", mock_workflow)
 
-        # Call the method that contains the session.flush() changes
-        processor._create_application_based_incident(
-            tenant_id=tenant_id,
-            application=application,
-            services_with_alerts=services_with_alerts,
-        )
+    # Create the topology processor and call the method
+    processor = TopologyProcessor()
+
+    # Call the method that contains the session.flush() changes
+    processor._create_application_based_incident(
+        tenant_id=tenant_id,
+        application=application,
+        services_with_alerts=services_with_alerts,
+    )
 
-        # Verify workflow event was called
-        assert mock_workflow.call_count == 1
-        call_args = mock_workflow.call_args
-        assert call_args[0][0] == tenant_id
-        assert call_args[0][2].user_generated_name == f"Application incident: {application.name}"
-        assert call_args[0][3] == "created"
+    # Verify workflow event was called
+    assert mock_workflow.call_count == 1
+    call_args = mock_workflow.call_args
+    assert call_args[0][0] == tenant_id
+    assert call_args[0][2].user_generated_name == f"Application incident: {application.name}"
+    assert call_args[0][3] == "created"
 
     # Verify incident was created
     incidents_after = db_session.exec(
@@ -517,20 +632,17 @@ def test_create_application_based_incident_with_flush(db_session):
     db_session.refresh(incident)
 
     # Query incident-alert relationships
-    from keep.api.models.db.alert import AlertToIncident
     incident_alerts = db_session.exec(
-        select(AlertToIncident).where(AlertToIncident.incident_id == incident.id)
+        select(LastAlertToIncident).where(
+            LastAlertToIncident.incident_id == incident.id
+        )
     ).all()
 
     # Verify both alerts are assigned to the incident
     assert len(incident_alerts) == 2
-    assigned_alert_ids = {ia.alert_id for ia in incident_alerts}
-    assert alert_1.id in assigned_alert_ids
-    assert alert_2.id in assigned_alert_ids
+    assigned_fingerprints = {ia.fingerprint for ia in incident_alerts}
+    assert alert_1.fingerprint in assigned_fingerprints
+    assert alert_2.fingerprint in assigned_fingerprints
 
     # Verify the incident can be queried and is properly persisted
-    queried_incident = db_session.exec(
-        select(Incident).where(Incident.id == incident.id)
-    ).first()
-    assert queried_incident is not None
-    assert queried_incident.id == incident.id
+    assert _exists(db_session, Incident.id, Incident.id == incident.id)